@@ -4,11 +4,13 @@ arsenal - Native terminal cheat launcher
 Simple, bulletproof curses TUI that works everywhere.
 """
 import curses
+import functools
 import os
 import re
 import json
 import subprocess
 import sys
+from collections import OrderedDict, defaultdict
 from pathlib import Path
 
 # ============================================================================
@@ -24,6 +26,26 @@ DEFAULT_CHEAT_PATHS = [
 
 GLOBALS_FILE = Path.home() / ".arsenal.json"
 VAULTS_FILE = Path.home() / ".arsenal-vaults.json"
+CACHE_FILE = Path.home() / ".arsenal-cache.json"
+
+# Optional faster JSON backend, stdlib json is used when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def read_json(path):
+    """Read a JSON file."""
+    if orjson:
+        return orjson.loads(path.read_bytes())
+    return json.loads(path.read_bytes())
+
+def write_json(path, data, indent=True):
+    """Write a JSON file, indented for the hand-editable config files."""
+    if orjson:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0))
+    else:
+        path.write_text(json.dumps(data, indent=2 if indent else None))
 
 def load_vaults():
     """Load vault configurations. Returns dict of {name: [paths]}."""
@@ -32,10 +54,9 @@ def load_vaults():
     # Load custom vaults from config
     if VAULTS_FILE.exists():
         try:
-            with open(VAULTS_FILE) as f:
-                custom = json.load(f)
-                for name, paths in custom.items():
-                    vaults[name] = [Path(p) for p in paths]
+            custom = read_json(VAULTS_FILE)
+            for name, paths in custom.items():
+                vaults[name] = [Path(p) for p in paths]
         except:
             pass
 
@@ -59,43 +80,56 @@ def save_vaults(vaults):
     for name, paths in vaults.items():
         if name != "default":
             custom[name] = [str(p) for p in paths]
-    with open(VAULTS_FILE, "w") as f:
-        json.dump(custom, f, indent=2)
+    write_json(VAULTS_FILE, custom)
 
 # ============================================================================
 # CHEAT PARSING
 # ============================================================================
 
+# Compiled once at import; these run for every line/cheat on load and every frame
+TAG_RE = re.compile(r"#([\w/-]+)")
+PARAM_OPEN_RE = re.compile(r"<([^>|]+)")
+PARAM_FULL_RE = re.compile(r"<([^>]+)>")
+# Params usable as globals: 1-29 word chars, not all underscores, ended by > or |.
+# Other runs match the empty alternative so they are skipped whole like PARAM_OPEN_RE
+GLOBAL_PARAM_RE = re.compile(r"<(?:(?=_*[^\W_])(\w{1,29})(?![^>|])|[^>|]+)")
+
+# One scan per file: fence / H2 / H1 / tag lines, leading whitespace ignored
+MD_LINE_RE = re.compile(
+    r"^[^\S\n]*(?:(?P<fence>(?:```|~~~)[^\n]*)|## (?P<h2>[^\n]*)|# (?P<h1>[^\n]*)|(?P<tag>#[^\n]*))",
+    re.MULTILINE,
+)
+FENCE_RE = re.compile(r"^[^\S\n]*(?:```|~~~)[^\n]*", re.MULTILINE)
+
 def get_tool_name(cmd):
     """Extract tool name from command (first word, ignoring env vars and sudo)."""
-    # Split on newlines, take first line
-    first_line = cmd.strip().split("\n")[0].strip()
+    # Only the first line matters - don't strip/split the whole body
+    return tool_name_from_line(cmd.lstrip().split("\n", 1)[0].strip())
 
-    # Skip common prefixes
-    words = first_line.split()
-    skip = {"sudo", "env", "time", "nice", "nohup", "strace", "ltrace"}
+# Wrapper commands skipped when looking for the actual tool
+TOOL_PREFIXES = frozenset({"sudo", "env", "time", "nice", "nohup", "strace", "ltrace"})
 
-    for word in words:
+@functools.lru_cache(maxsize=4096)
+def tool_name_from_line(first_line):
+    """Tool name for a command's first line (memoized, many cheats share one)."""
+    for word in first_line.split():
         # Skip env var assignments (FOO=bar)
         if "=" in word:
             continue
+        word = word.lower()
         # Skip common prefixes
-        if word.lower() in skip:
+        if word in TOOL_PREFIXES:
             continue
         # Found the tool - clean it up
-        tool = word.split("/")[-1]  # Remove path
-        return tool.lower()
+        return sys.intern(word.rsplit("/", 1)[-1])  # Remove path
 
     return "other"
 
-def build_tool_tree(cheats):
-    """Group cheats by tool name, returns {tool: [cheats]} and sorted tool list."""
-    tree = {}
-    for c in cheats:
-        tool = get_tool_name(c["cmd"])
-        if tool not in tree:
-            tree[tool] = []
-        tree[tool].append(c)
+def build_tool_tree(indices, tool_names):
+    """Group cheat indices by tool name, returns {tool: [indices]} and sorted tool list."""
+    tree = defaultdict(list)
+    for i in indices:
+        tree[tool_names[i]].append(i)
 
     # Sort tools alphabetically, but put "other" last
     tools = sorted([t for t in tree.keys() if t != "other"])
@@ -104,30 +138,141 @@ def build_tool_tree(cheats):
 
     return tree, tools
 
-def load_cheats(paths=None):
-    """Load all cheats from markdown files and build tag index."""
-    if paths is None:
-        paths = DEFAULT_CHEAT_PATHS
+def cheat_columns(cheats):
+    """Split cheats into parallel per-field lists so the TUI can work on indices.
+
+    Returns {"title": [...], "cmd": [...], "tool": [...], "by_tag": {tag: [indices]}},
+    plus "search": title and cmd lowercased and joined by a newline, so a query
+    is one substring test per cheat, and "oneline": cmd flattened for list rows.
+    "tag_lower" / "tag_short" map each tag to its lowercase / last-segment name.
+    """
+    titles = [c["title"] for c in cheats]
+    cmds = [c["cmd"] for c in cheats]
+    by_tag = defaultdict(list)
+    by_tag["all"] = list(range(len(cheats)))
+    for i, c in enumerate(cheats):
+        for tag in c["tags"]:
+            by_tag[tag].append(i)
+    return {
+        "title": titles,
+        "cmd": cmds,
+        # Queries are typed printable chars, so they can never span the newline
+        "search": [f"{t}\n{cmd}".lower() for t, cmd in zip(titles, cmds)],
+        "oneline": [cmd.replace("\n", " ") for cmd in cmds],
+        "tool": [get_tool_name(cmd) for cmd in cmds],
+        "by_tag": by_tag,
+        "tag_lower": {t: t.lower() for t in by_tag},
+        "tag_short": {t: t.rsplit("/", 1)[-1] for t in by_tag},  # "cat/ad" -> "ad"
+    }
+
+# Bump when the cached entry layout changes, older caches are then ignored
+CACHE_VERSION = 2
+
+# In-memory copy of the parse cache, read from CACHE_FILE on first use and updated in place
+PARSE_CACHE = None
+
+def load_parse_cache():
+    """Load parsed cheats cache. Returns dict of {path: [mtime_ns, size, entries]}.
+
+    The file is only read once per session; later calls (reloads, the vault picker)
+    get the same dict, which load_cheats keeps current and saves when it changes.
+    """
+    global PARSE_CACHE
+    if PARSE_CACHE is None:
+        PARSE_CACHE = {}
+        if CACHE_FILE.exists():
+            try:
+                data = read_json(CACHE_FILE)
+                if data.get("version") == CACHE_VERSION:
+                    PARSE_CACHE = data["files"]
+            except:
+                pass
+    return PARSE_CACHE
 
-    cheats = []
+def save_parse_cache(cache):
+    """Save parsed cheats cache (best effort, it is rebuilt on demand)."""
+    try:
+        write_json(CACHE_FILE, {"version": CACHE_VERSION, "files": cache}, indent=False)
+    except:
+        pass
+
+# Markdown files that document a cheat directory rather than hold cheats
+SKIP_MD_NAMES = frozenset({"readme.md"})
+
+def find_md_files(base):
+    """Yield cheat markdown files under base, skipping hidden dirs (.git etc.)."""
+    for dirpath, dirnames, filenames in os.walk(base):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for name in filenames:
+            if name.endswith(".md") and name.lower() not in SKIP_MD_NAMES:
+                yield Path(dirpath) / name
 
+def stat_md_files(paths):
+    """List (path, key, [mtime_ns, size]) for every cheat file under paths."""
+    files = []
     for base in paths:
-        if not base.exists():
-            continue
-        for md in base.rglob("*.md"):
-            if md.name.lower() == "readme.md":
-                continue
+        for md in find_md_files(base):
             try:
-                cheats.extend(parse_md(md))
+                st = md.stat()
+                files.append((md, str(md), [st.st_mtime_ns, st.st_size]))
             except:
                 pass
+    return files
+
+def load_cheats(paths=None, files=None):
+    """Load all cheats from markdown files and build tag index.
+
+    files is stat_md_files(paths) when the caller already has it.
+    """
+    if paths is None:
+        paths = DEFAULT_CHEAT_PATHS
+    if files is None:
+        files = stat_md_files(paths)
+
+    cache = load_parse_cache()
+    dirty = False
+
+    seen = {key for _, key, _ in files}
+
+    # Re-parse only files changed since they were cached, overlapping their I/O
+    stale = [(md, key, stamp) for md, key, stamp in files if (cache.get(key) or [])[:2] != stamp]
+    fresh = {}
+    if stale:
+        # Imported here: pulls in logging, and warm starts / `scan` never need it
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor() as ex:
+            for (md, key, stamp), parsed in zip(stale, ex.map(parse_md, [md for md, _, _ in stale])):
+                fresh[key] = parsed
+                cache[key] = stamp + [[[c["title"], c["cmd"], list(c["tags"]), sorted(c["params"])] for c in parsed]]
+        dirty = True
+
+    cheats = []
+    for _, key, _ in files:
+        if key in fresh:
+            cheats.extend(fresh[key])
+            continue
+        try:
+            cheats.extend(
+                {"title": t, "cmd": cmd, "tags": tuple(map(sys.intern, tg)), "params": frozenset(ps), "path": key}
+                for t, cmd, tg, ps in cache[key][2]
+            )
+        except:
+            pass
+
+    # Drop entries for files that no longer exist under these paths
+    prefixes = tuple(str(base) + os.sep for base in paths)
+    for key in [k for k in cache if k.startswith(prefixes) and k not in seen]:
+        del cache[key]
+        dirty = True
+
+    if dirty:
+        save_parse_cache(cache)
 
     # Build tag index
-    tag_to_cheats = {"all": cheats}
+    tag_to_cheats = defaultdict(list)
+    tag_to_cheats["all"] = cheats
     for c in cheats:
         for tag in c["tags"]:
-            if tag not in tag_to_cheats:
-                tag_to_cheats[tag] = []
             tag_to_cheats[tag].append(c)
 
     # Sort tags: "all" first, then alphabetically
@@ -135,58 +280,93 @@ def load_cheats(paths=None):
 
     return cheats, tag_to_cheats, tags
 
+# Loaded vaults for this session, keyed by their path tuple: (file stamps, loaded vault)
+VAULT_CHEATS = {}
+
+def load_vault_cheats(paths):
+    """Load cheats for a vault, reusing the last load while none of its files changed.
+
+    Returns load_cheats()'s (cheats, tag_to_cheats, tags) plus cheat_columns(cheats).
+    """
+    key = tuple(paths)
+    files = stat_md_files(paths)
+    stamps = [(k, stamp) for _, k, stamp in files]
+    entry = VAULT_CHEATS.get(key)
+    if entry is None or entry[0] != stamps:
+        cheats, tag_to_cheats, tags = load_cheats(paths, files)
+        entry = VAULT_CHEATS[key] = (stamps, (cheats, tag_to_cheats, tags, cheat_columns(cheats)))
+    return entry[1]
+
+def vault_cheat_count(paths, parse_cache):
+    """Number of cheats in a vault without walking it, None if it was never parsed.
+
+    Uses the vault's last load this session if there is one, else the parse cache
+    as of its last load. Switching to the vault revalidates it.
+    """
+    key = tuple(paths)
+    if key in VAULT_CHEATS:
+        return len(VAULT_CHEATS[key][1][0])
+    prefixes = tuple(str(base) + os.sep for base in paths)
+    rows = [entry[2] for k, entry in parse_cache.items() if k.startswith(prefixes)]
+    return sum(map(len, rows)) if rows else None
+
 def parse_md(path):
     """Parse markdown file for cheats."""
     cheats = []
-    text = path.read_text(errors="ignore")
+    try:
+        text = path.read_text(errors="ignore")
+    except OSError:
+        return cheats
 
+    path_str = str(path)
     title = None
-    tags = []
-    in_code = False
-    code_lines = []
+    tags = ()  # Shared by every cheat in the section, rebuilt only on H1/tag lines
+    pos = 0
 
-    for line in text.split("\n"):
-        stripped = line.strip()
-
-        # Code fence toggle
-        if stripped.startswith("```") or stripped.startswith("~~~"):
-            if in_code:
-                # End of code block - save cheat
-                if title and code_lines:
-                    cmd = "\n".join(code_lines).strip()
-                    if cmd:
-                        cheats.append({
-                            "title": title,
-                            "cmd": cmd,
-                            "tags": tuple(tags),
-                            "path": str(path),
-                        })
-                code_lines = []
-                in_code = False
-                title = None
-            else:
-                in_code = True
+    # Only structural lines match, so prose is skipped by the regex engine
+    while True:
+        m = MD_LINE_RE.search(text, pos)
+        if not m:
+            break
+        pos = m.end()
+        kind = m.lastgroup
+
+        # Code fence - jump straight to the closing fence, nothing inside is structure
+        if kind == "fence":
+            body_start = m.end() + 1
+            end = FENCE_RE.search(text, body_start)
+            if not end:
+                break
+            cmd = text[body_start:end.start()].strip()
+            if title and cmd:
+                cheats.append({
+                    "title": title,
+                    "cmd": cmd,
+                    "tags": tags,
+                    "params": global_params(cmd),
+                    "path": path_str,
+                })
+            title = None
+            pos = end.end()
             continue
 
-        if in_code:
-            code_lines.append(line)
-            continue
+        value = m.group(kind)
 
         # H2 = command title
-        if stripped.startswith("## "):
-            title = stripped[3:].strip()
-            continue
+        if kind == "h2":
+            value = value.strip()
+            if value:
+                title = value
 
         # H1 = reset
-        if stripped.startswith("# ") and not stripped.startswith("## "):
-            tags = []
-            title = None
-            continue
+        elif kind == "h1":
+            if value.strip():
+                tags = ()
+                title = None
 
         # Tags
-        if stripped.startswith("#") and "/" in stripped:
-            for match in re.findall(r"#([\w/-]+)", stripped):
-                tags.append(match.lower())
+        elif "/" in value:
+            tags += tuple(sys.intern(match.lower()) for match in TAG_RE.findall(value))
 
     return cheats
 
@@ -194,14 +374,16 @@ def parse_md(path):
 # GLOBALS
 # ============================================================================
 
+def global_params(cmd):
+    """Parameter names in a command that can be globals (extracted once at parse time)."""
+    # Things that look like paths or garbage come back as ""
+    return frozenset(filter(None, GLOBAL_PARAM_RE.findall(cmd)))
+
 def extract_params_from_cheats(cheats):
     """Extract all unique parameters from loaded cheats."""
     params = set()
     for c in cheats:
-        for m in re.findall(r"<([^>|]+)", c["cmd"]):
-            # Skip things that look like paths or garbage
-            if "/" not in m and len(m) < 30 and m.replace("_", "").isalnum():
-                params.add(m)
+        params.update(c["params"])
     return sorted(params)
 
 def load_globals(cheats=None):
@@ -211,30 +393,27 @@ def load_globals(cheats=None):
     # Load saved globals
     if GLOBALS_FILE.exists():
         try:
-            globals_dict = json.loads(GLOBALS_FILE.read_text())
+            globals_dict = read_json(GLOBALS_FILE)
         except:
             pass
 
     # Add any params from cheats that aren't already globals
     if cheats:
-        for param in extract_params_from_cheats(cheats):
-            if param not in globals_dict:
-                globals_dict[param] = ""
+        new = set(extract_params_from_cheats(cheats)).difference(globals_dict)
+        globals_dict.update(dict.fromkeys(sorted(new), ""))
 
     return globals_dict
 
 def load_globals_simple():
     """Load globals without cheat scanning (for scan command)."""
-    if GLOBALS_FILE.exists():
-        try:
-            return json.loads(GLOBALS_FILE.read_text())
-        except:
-            pass
-    return {}
+    try:
+        return read_json(GLOBALS_FILE)
+    except:
+        return {}
 
 def save_globals(g):
     """Save globals to file."""
-    GLOBALS_FILE.write_text(json.dumps(g, indent=2))
+    write_json(GLOBALS_FILE, g)
 
 # ============================================================================
 # HELPERS
@@ -245,16 +424,12 @@ def fill_params(cmd, globals_dict):
     def replace(m):
         key = m.group(1).split("|")[0]
         return globals_dict.get(key, m.group(0))
-    return re.sub(r"<([^>]+)>", replace, cmd)
+    return PARAM_FULL_RE.sub(replace, cmd)
 
+@functools.lru_cache(maxsize=4096)
 def get_params(cmd):
-    """Extract parameter names from command."""
-    params = []
-    for m in re.finditer(r"<([^>|]+)", cmd):
-        p = m.group(1)
-        if p not in params:
-            params.append(p)
-    return params
+    """Extract parameter names from command, in order of first use (a tuple, as it is cached)."""
+    return tuple(dict.fromkeys(PARAM_OPEN_RE.findall(cmd)))
 
 def wrap_text(text, width):
     """Wrap text to fit within width, preserving existing newlines."""
@@ -262,32 +437,47 @@ def wrap_text(text, width):
     for line in text.split("\n"):
         if len(line) <= width:
             result.append(line)
-        else:
-            # Wrap long lines
-            while len(line) > width:
-                # Try to break at space
-                break_at = line.rfind(" ", 0, width)
-                if break_at <= 0:
-                    break_at = width
-                result.append(line[:break_at])
-                line = line[break_at:].lstrip()
-            if line:
-                result.append(line)
+            continue
+        # Walk offsets instead of re-slicing the remainder after every break
+        start, end = 0, len(line)
+        while end - start > width:
+            # Try to break at space
+            break_at = line.rfind(" ", start, start + width)
+            if break_at <= start:
+                break_at = start + width
+            result.append(line[start:break_at])
+            start = break_at
+            while start < end and line[start].isspace():
+                start += 1
+        if start < end:
+            result.append(line[start:])
     return result
 
+@functools.lru_cache(maxsize=1)
+def clipboard_cmd():
+    """Clipboard command for this system, detected once. None if there is none."""
+    if sys.platform == "darwin":
+        return ["pbcopy"]
+    import shutil
+    for cmd in (["xclip", "-sel", "clip"], ["wl-copy"]):
+        if shutil.which(cmd[0]):
+            return cmd
+    return None
+
 def copy_cmd(text):
     """Copy to clipboard."""
+    cmd = clipboard_cmd()
+    if not cmd:
+        return False
     try:
-        if sys.platform == "darwin":
-            subprocess.run(["pbcopy"], input=text.encode(), check=True)
-        else:
-            subprocess.run(["xclip", "-sel", "clip"], input=text.encode(), check=True)
+        subprocess.run(cmd, input=text.encode(), check=True)
         return True
     except:
         return False
 
+@functools.lru_cache(maxsize=1)
 def in_tmux():
-    """Check if we're running inside tmux."""
+    """Check if we're running inside tmux (cached, fixed for the session)."""
     # Method 1: TMUX env var
     if os.environ.get("TMUX"):
         return True
@@ -348,6 +538,11 @@ def get_tmux_target():
         return TMUX_TARGET_PANE
 
     # Otherwise auto-select next pane
+    return auto_tmux_target()
+
+@functools.lru_cache(maxsize=1)
+def auto_tmux_target():
+    """Auto-selected pane (next pane if any). Cached until the pane picker runs."""
     try:
         result = subprocess.run(
             ["tmux", "list-panes"],
@@ -372,14 +567,10 @@ def send_tmux(text, execute=False):
     try:
         target = get_tmux_target()
 
-        # For multi-line commands, send each line separately
-        lines = text.split("\n")
-        for i, line in enumerate(lines):
-            # Use -l for literal, -t for target pane
-            subprocess.run(["tmux", "send-keys", "-t", target, "-l", line], check=True)
-            # Add newline between lines (but not after last if not executing)
-            if i < len(lines) - 1:
-                subprocess.run(["tmux", "send-keys", "-t", target, "Enter"], check=True)
+        # One paste for the whole command instead of a send-keys per line;
+        # paste-buffer turns newlines into Enter like the per-line sends did
+        subprocess.run(["tmux", "load-buffer", "-b", "arsenal", "-"], input=text.encode(), check=True)
+        subprocess.run(["tmux", "paste-buffer", "-d", "-b", "arsenal", "-t", target], check=True)
 
         if execute:
             subprocess.run(["tmux", "send-keys", "-t", target, "Enter"], check=True)
@@ -396,13 +587,62 @@ def safe_addstr(win, y, x, text, attr=0):
     h, w = win.getmaxyx()
     if y < 0 or y >= h or x < 0 or x >= w:
         return
-    text = str(text)[:w - x - 1]
+    if not isinstance(text, str):
+        text = str(text)
+    n = w - x - 1
+    if len(text) > n:
+        text = text[:n]
     if text:
         try:
             win.addstr(y, x, text, attr)
         except curses.error:
             pass
 
+def read_key(win):
+    """Read one key: printable characters as str, anything else as an int code (-1 on error)."""
+    try:
+        ch = win.get_wch()
+    except curses.error:
+        return -1
+    if isinstance(ch, str):
+        return ch if ch.isprintable() else ord(ch)
+    return ch
+
+def drain_text(win, text):
+    """Append the printable keys already queued behind text (fast typing, pastes).
+
+    The first other key is pushed back for the next read.
+    """
+    win.nodelay(True)
+    try:
+        while True:
+            try:
+                ch = win.get_wch()
+            except curses.error:
+                return text
+            if isinstance(ch, str):
+                if ch.isprintable():
+                    text += ch
+                    continue
+                # ungetch() would push back a single byte, e.g. a lone 0xA0 for U+00A0
+                curses.unget_wch(ch)
+            else:
+                curses.ungetch(ch)
+            return text
+    finally:
+        win.nodelay(False)
+
+# Backspace arrives as KEY_BACKSPACE, DEL or ^H depending on the terminal
+BACKSPACE_KEYS = frozenset({curses.KEY_BACKSPACE, 127, 8})
+
+# Non-printable keys run_tui acts on (printable characters always go to search).
+# Anything else is read past without drawing a new frame.
+TUI_KEYS = frozenset({
+    -1, 1, 3, 4, 7, 8, 9, 10, 15, 16, 17, 20, 21, 22, 25, 27, 127,
+    curses.KEY_BACKSPACE, curses.KEY_RIGHT, curses.KEY_LEFT, curses.KEY_DOWN, curses.KEY_UP,
+    curses.KEY_NPAGE, curses.KEY_PPAGE, curses.KEY_RESIZE,
+})
+
 def run_tui(stdscr):
     """Main TUI loop."""
     # Setup - CRITICAL for input handling
@@ -423,7 +663,7 @@ def run_tui(stdscr):
     # Load vaults and cheats
     vaults = load_vaults()
     current_vault = "default"
-    cheats, tag_to_cheats, tags = load_cheats(vaults.get(current_vault, DEFAULT_CHEAT_PATHS))
+    cheats, _, tags, cols = load_vault_cheats(vaults.get(current_vault, DEFAULT_CHEAT_PATHS))
     if not cheats:
         safe_addstr(stdscr, 0, 0, "No cheats found! Check ~/.cheats or aliasr installation")
         stdscr.getch()
@@ -436,10 +676,9 @@ def run_tui(stdscr):
     query = ""
     selected = 0
     scroll = 0
-    current_tag_idx = 0  # Index into tags list, 0 = "all"
     current_tag = tags[0]  # "all"
-    pool = cheats[:]  # Cheats in current tag
-    filtered = cheats[:]  # Filtered by search
+    pool = cols["by_tag"]["all"]  # Cheat indices in current tag
+    filtered = pool[:]  # Filtered by search
     focus = "search"  # "search" or "list"
     message = f"[{current_vault}] {len(cheats)} cheats"
 
@@ -447,52 +686,99 @@ def run_tui(stdscr):
     view_mode = "flat"  # "flat" or "tree"
     expanded = set()  # Set of expanded tool names
     tree_items = []  # List of (type, data) where type is "tool" or "cmd"
+    last_size = None
+
+    # Previous frame's search, refined instead of redone while the query only grows
+    prev_q = ""
+    prev_tags = prev_pool = prev_filtered = None
+    index_src = None  # filtered_tags that filtered_tag_index was built for
+
+    # Tree view cache: regrouped when the matches change, relisted when expansion changes
+    tree_src = tree_expanded = None
+    flat_src = None
+
+    # Filled and wrapped preview per (cheat index, width), cleared when cheats or globals change.
+    # Kept to the most recently shown 32, enough to scroll back and forth without refilling.
+    preview_cache = OrderedDict()
 
     while True:
         h, w = stdscr.getmaxyx()
-        stdscr.erase()
-
-        # Filter tags by search query
-        if query:
-            q = query.lower()
-            filtered_tags = [t for t in tags if q in t.lower() or t == "all"]
+        # Every row below is drawn full width, so curses only has to send the
+        # cells that changed; a full erase is needed only when the size changes
+        if (h, w) != last_size:
+            stdscr.erase()
+            last_size = (h, w)
+            # safe_addstr leaves the last column alone, so rows are w - 1 wide
+            blank = " " * (w - 1)
+            hline = "─" * (w - 1)
+            # List columns: title in the left third, command in the rest
+            col_x = w // 3
+            cmd_len = w * 2 // 3 - 2
+            cmd_pad = w - col_x - 1
+        # The TUI refers to cheats by index into the vault's columns
+        titles, cmds, onelines = cols["title"], cols["cmd"], cols["oneline"]
+        tags_lower, tag_short = cols["tag_lower"], cols["tag_short"]
+
+        # Filter tags by search query (extending a query can only drop matches)
+        q = query.lower()
+        grown = bool(prev_q) and q.startswith(prev_q)
+        if q and q == prev_q:
+            filtered_tags = prev_tags
+        elif q:
+            src = prev_tags if grown else tags
+            filtered_tags = [t for t in src if t == "all" or q in tags_lower[t]]
             if not filtered_tags:
                 filtered_tags = ["all"]
         else:
             filtered_tags = tags
 
+        # Position of each visible tag, rebuilt only when the tag list changes
+        if filtered_tags is not index_src:
+            filtered_tag_index = {t: i for i, t in enumerate(filtered_tags)}
+            index_src = filtered_tags
+
         # Ensure current tag is in filtered list, or switch to first match
-        if current_tag not in filtered_tags:
+        if current_tag not in filtered_tag_index:
             current_tag = filtered_tags[0]
-            current_tag_idx = tags.index(current_tag)
 
         # Get cheats for current tag
-        pool = tag_to_cheats.get(current_tag, cheats)
-
-        # Filter cheats by search query
-        if query:
-            q = query.lower()
-            filtered = [c for c in pool if q in c["title"].lower() or q in c["cmd"].lower()]
+        pool = cols["by_tag"].get(current_tag, cols["by_tag"]["all"])
+
+        # Filter cheats by search query, keeping the same list while nothing changed
+        if q == prev_q and pool is prev_pool:
+            filtered = prev_filtered
+        elif q:
+            src = prev_filtered if grown and pool is prev_pool else pool
+            search = cols["search"]
+            filtered = [i for i in src if q in search[i]]
         else:
             filtered = pool[:]
+        prev_q, prev_tags, prev_pool, prev_filtered = q, filtered_tags, pool, filtered
 
         # Build tree view items if in tree mode
         if view_mode == "tree":
-            tree, tools = build_tool_tree(filtered)
-            tree_items = []
-            for tool in tools:
-                # Filter tools by query too
-                if query and query.lower() not in tool.lower():
-                    # Check if any commands match
-                    if not tree.get(tool):
-                        continue
-                tree_items.append(("tool", tool, len(tree.get(tool, []))))
-                if tool in expanded:
-                    for c in tree.get(tool, []):
-                        tree_items.append(("cmd", c, None))
+            if filtered is not tree_src:
+                tree, tools = build_tool_tree(filtered, cols["tool"])
+                tree_src, tree_expanded = filtered, None
+            if expanded != tree_expanded:
+                tree_items.clear()
+                for tool in tools:
+                    # Filter tools by query too
+                    if q and q not in tool:  # Tool names are already lowercase
+                        # Check if any commands match
+                        if not tree.get(tool):
+                            continue
+                    tree_items.append(("tool", tool, len(tree.get(tool, []))))
+                    if tool in expanded:
+                        for i in tree.get(tool, []):
+                            tree_items.append(("cmd", i, None))
+                tree_expanded = set(expanded)
             display_items = tree_items
         else:
-            display_items = [("cmd", c, None) for c in filtered]
+            if filtered is not flat_src:
+                flat_items = [("cmd", i, None) for i in filtered]
+                flat_src = filtered
+            display_items = flat_items
 
         # Clamp selection
         if display_items:
@@ -511,7 +797,7 @@ def run_tui(stdscr):
         scroll = max(0, scroll)
 
         # Draw header with current tag (show tag count when filtering)
-        tag_display = current_tag.split("/")[-1] if "/" in current_tag else current_tag
+        tag_display = tag_short[current_tag]
         mode_indicator = "TREE" if view_mode == "tree" else "FLAT"
         if query and len(filtered_tags) < len(tags):
             header = f" ARSENAL [{tag_display}] [{len(filtered)}/{len(pool)}] ({len(filtered_tags)} tags) [{mode_indicator}] "
@@ -520,7 +806,7 @@ def run_tui(stdscr):
         safe_addstr(stdscr, 0, 0, header.center(w), curses.color_pair(4) | curses.A_BOLD)
 
         # Draw tag bar (sliding window centered on current, filtered by search)
-        filtered_tag_idx = filtered_tags.index(current_tag) if current_tag in filtered_tags else 0
+        filtered_tag_idx = filtered_tag_index.get(current_tag, 0)
         max_visible = 12
         start = max(0, filtered_tag_idx - max_visible // 2)
         end = min(len(filtered_tags), start + max_visible)
@@ -530,20 +816,21 @@ def run_tui(stdscr):
         tag_line = "◀ " if start > 0 else "  "
         for i in range(start, end):
             tag = filtered_tags[i]
-            display = tag.split("/")[-1] if "/" in tag else tag
+            display = tag_short[tag]
             if tag == current_tag:
                 tag_line += f"[{display}] "
             else:
                 tag_line += f" {display}  "
         if end < len(filtered_tags):
             tag_line += "▶"
-        safe_addstr(stdscr, 1, 0, tag_line[:w-1], curses.color_pair(1))
+        safe_addstr(stdscr, 1, 0, tag_line.ljust(w - 1), curses.color_pair(1))
 
         # Draw search (show cursor only when focused)
         if focus == "search":
-            safe_addstr(stdscr, 2, 0, "> " + query + "█", curses.color_pair(3))
+            safe_addstr(stdscr, 2, 0, ("> " + query + "█").ljust(w - 1), curses.color_pair(3))
         else:
-            safe_addstr(stdscr, 2, 0, "> " + query, curses.color_pair(2))
+            safe_addstr(stdscr, 2, 0, ("> " + query).ljust(w - 1), curses.color_pair(2))
+        safe_addstr(stdscr, 3, 0, blank)
 
         # Draw list
         for i in range(list_h):
@@ -552,7 +839,7 @@ def run_tui(stdscr):
 
             if idx >= len(display_items):
                 # Clear empty rows
-                safe_addstr(stdscr, y, 0, " " * (w - 1), 0)
+                safe_addstr(stdscr, y, 0, blank, 0)
                 continue
 
             item_type, item_data, item_extra = display_items[idx]
@@ -576,25 +863,24 @@ def run_tui(stdscr):
                 safe_addstr(stdscr, y, 0, display.ljust(w - 1), curses.color_pair(1) | curses.A_BOLD | attr)
             else:
                 # Command row
-                c = item_data
                 if view_mode == "tree":
                     # Indented for tree view
-                    title = "  " + c["title"][:w//3-3]
-                    cmd_preview = c["cmd"].replace("\n", " ")[:w*2//3-2]
+                    title = "  " + titles[item_data][:col_x - 3]
                 else:
-                    title = c["title"][:w//3-1]
-                    cmd_preview = c["cmd"].replace("\n", " ")[:w*2//3-2]
+                    title = titles[item_data][:col_x - 1]
+                cmd_preview = onelines[item_data][:cmd_len]
 
-                safe_addstr(stdscr, y, 0, title.ljust(w//3), curses.color_pair(1) | attr)
-                safe_addstr(stdscr, y, w//3, cmd_preview.ljust(w - w//3 - 1), curses.color_pair(2) | attr)
+                safe_addstr(stdscr, y, 0, title.ljust(col_x), curses.color_pair(1) | attr)
+                safe_addstr(stdscr, y, col_x, cmd_preview.ljust(cmd_pad), curses.color_pair(2) | attr)
 
         # Draw preview
         preview_y = 4 + list_h
-        safe_addstr(stdscr, preview_y, 0, "─" * w, curses.color_pair(1))
+        safe_addstr(stdscr, preview_y, 0, hline, curses.color_pair(1))
 
         # Calculate available preview lines (screen height - preview_y - title line - status line)
         preview_lines_avail = max(1, h - preview_y - 3)
 
+        preview = []  # (text, attr) per line below the divider
         if display_items and selected < len(display_items):
             item_type, item_data, item_extra = display_items[selected]
 
@@ -602,22 +888,35 @@ def run_tui(stdscr):
                 # Show tool summary
                 tool_name = item_data
                 count = item_extra
-                safe_addstr(stdscr, preview_y + 1, 0, f"{tool_name} - {count} commands", curses.color_pair(1) | curses.A_BOLD)
-                safe_addstr(stdscr, preview_y + 2, 0, "Press Enter to expand/collapse", curses.color_pair(2))
+                preview.append((f"{tool_name} - {count} commands", curses.color_pair(1) | curses.A_BOLD))
+                preview.append(("Press Enter to expand/collapse", curses.color_pair(2)))
             else:
-                c = item_data
-                safe_addstr(stdscr, preview_y + 1, 0, c["title"][:w-1], curses.color_pair(1) | curses.A_BOLD)
+                preview.append((titles[item_data], curses.color_pair(1) | curses.A_BOLD))
 
                 # Show command with globals filled, wrapped to fit
-                cmd = fill_params(c["cmd"], globals_dict)
-                wrapped = wrap_text(cmd, w - 1)
-                for i, line in enumerate(wrapped[:preview_lines_avail]):
-                    safe_addstr(stdscr, preview_y + 2 + i, 0, line, curses.color_pair(2))
+                key = (item_data, w)
+                wrapped = preview_cache.get(key)
+                if wrapped is None:
+                    wrapped = wrap_text(fill_params(cmds[item_data], globals_dict), w - 1)
+                    preview_cache[key] = wrapped
+                    if len(preview_cache) > 32:
+                        preview_cache.popitem(last=False)
+                else:
+                    preview_cache.move_to_end(key)
+                for line in wrapped[:preview_lines_avail]:
+                    preview.append((line, curses.color_pair(2)))
 
                 # Show overflow indicator if command is too long
                 if len(wrapped) > preview_lines_avail:
-                    safe_addstr(stdscr, preview_y + 2 + preview_lines_avail, 0,
-                               f"... ({len(wrapped) - preview_lines_avail} more lines)", curses.color_pair(1))
+                    preview.append((f"... ({len(wrapped) - preview_lines_avail} more lines)", curses.color_pair(1)))
+
+        # Pad to the status line so the previous preview never shows through
+        for i, y in enumerate(range(preview_y + 1, h - 1)):
+            if i < len(preview):
+                text, attr = preview[i]
+                safe_addstr(stdscr, y, 0, text.ljust(w - 1), attr)
+            else:
+                safe_addstr(stdscr, y, 0, blank)
 
         # Draw status
         target_pane = TMUX_TARGET_PANE
@@ -626,13 +925,15 @@ def run_tui(stdscr):
         else:
             pane_indicator = ""
         status = f" {pane_indicator}{message} | Enter:run  ^O:copy  ^T:pane  ^V:view  ^P:vault  q:quit "
-        safe_addstr(stdscr, h - 1, 0, status[:w].ljust(w), curses.color_pair(4))
+        safe_addstr(stdscr, h - 1, 0, status[:w - 1].ljust(w - 1), curses.color_pair(4))
 
         stdscr.refresh()
 
         # Input
         try:
-            ch = stdscr.getch()
+            ch = read_key(stdscr)
+            while ch not in TUI_KEYS and not isinstance(ch, str):
+                ch = read_key(stdscr)
         except:
             continue
 
@@ -640,7 +941,7 @@ def run_tui(stdscr):
         if ch == 17 or ch == 3 or ch == -1:  # Ctrl+Q or Ctrl+C or error = quit
             break
 
-        elif ch == ord('q') and not query:  # 'q' quits when search empty
+        elif ch == "q" and not query:  # 'q' quits when search empty
             break
 
         elif ch == ord('\t'):  # Tab = switch focus
@@ -666,8 +967,7 @@ def run_tui(stdscr):
                         expanded.add(tool_name)
                 else:
                     # Run command
-                    c = item_data
-                    cmd = interactive_params(stdscr, c["cmd"], globals_dict)
+                    cmd = interactive_params(stdscr, cmds[item_data], globals_dict)
                     if cmd is None:
                         message = "Cancelled"
                     elif send_tmux(cmd, execute=True):
@@ -681,8 +981,7 @@ def run_tui(stdscr):
             if display_items and selected < len(display_items):
                 item_type, item_data, _ = display_items[selected]
                 if item_type == "cmd":
-                    c = item_data
-                    cmd = interactive_params(stdscr, c["cmd"], globals_dict)
+                    cmd = interactive_params(stdscr, cmds[item_data], globals_dict)
                     if cmd is None:
                         message = "Cancelled"
                     elif copy_cmd(cmd):
@@ -702,10 +1001,10 @@ def run_tui(stdscr):
             if new_vault and new_vault != current_vault:
                 current_vault = new_vault
                 vaults = load_vaults()  # Refresh vaults
-                cheats, tag_to_cheats, tags = load_cheats(vaults.get(current_vault, DEFAULT_CHEAT_PATHS))
+                cheats, _, tags, cols = load_vault_cheats(vaults.get(current_vault, DEFAULT_CHEAT_PATHS))
                 globals_dict = load_globals(cheats)
+                preview_cache.clear()
                 current_tag = "all"
-                current_tag_idx = 0
                 selected = 0
                 scroll = 0
                 query = ""
@@ -718,23 +1017,24 @@ def run_tui(stdscr):
             if display_items and selected < len(display_items):
                 item_type, item_data, _ = display_items[selected]
                 if item_type == "cmd":
-                    if copy_cmd(item_data["cmd"]):
+                    if copy_cmd(cmds[item_data]):
                         message = "Copied raw!"
                     else:
                         message = "Copy failed"
 
         elif ch == 7:  # Ctrl+G = globals editor
             edit_globals(stdscr, globals_dict)
+            preview_cache.clear()
             message = "Globals updated"
 
         elif ch == 1:  # Ctrl+A = add new cheat
             if add_cheat(stdscr, globals_dict):
                 # Reload cheats
-                cheats, tag_to_cheats, tags = load_cheats()
+                cheats, _, tags, cols = load_vault_cheats(DEFAULT_CHEAT_PATHS)
                 globals_dict = load_globals(cheats)
+                preview_cache.clear()
                 save_globals(globals_dict)
                 current_tag = "all"
-                current_tag_idx = 0
                 selected = 0
                 scroll = 0
                 query = ""
@@ -756,34 +1056,30 @@ def run_tui(stdscr):
             else:
                 message = "Not in tmux"
 
-        elif ch == curses.KEY_BACKSPACE or ch == 127 or ch == 8:
+        elif ch in BACKSPACE_KEYS:
             query = query[:-1]
             selected = 0
             scroll = 0
 
         # Typing ALWAYS goes to search (global)
-        elif 32 <= ch <= 126:
-            query += chr(ch)
+        elif isinstance(ch, str):
+            query += drain_text(stdscr, ch)  # One frame for a whole burst
             selected = 0
             scroll = 0
             focus = "search"
 
         # Arrow keys - category navigation (works in both modes)
         elif ch == curses.KEY_RIGHT:
-            if current_tag in filtered_tags:
-                idx = filtered_tags.index(current_tag)
-                idx = (idx + 1) % len(filtered_tags)
+            if current_tag in filtered_tag_index:
+                idx = (filtered_tag_index[current_tag] + 1) % len(filtered_tags)
                 current_tag = filtered_tags[idx]
-                current_tag_idx = tags.index(current_tag)
             selected = 0
             scroll = 0
 
         elif ch == curses.KEY_LEFT:
-            if current_tag in filtered_tags:
-                idx = filtered_tags.index(current_tag)
-                idx = (idx - 1) % len(filtered_tags)
+            if current_tag in filtered_tag_index:
+                idx = (filtered_tag_index[current_tag] - 1) % len(filtered_tags)
                 current_tag = filtered_tags[idx]
-                current_tag_idx = tags.index(current_tag)
             selected = 0
             scroll = 0
 
@@ -812,6 +1108,9 @@ def pick_pane(stdscr):
     global TMUX_TARGET_PANE
     stdscr.keypad(True)
 
+    # Layout may have changed since the auto target was probed
+    auto_tmux_target.cache_clear()
+
     panes = list_tmux_panes()
     if not panes:
         return None
@@ -861,7 +1160,7 @@ def pick_pane(stdscr):
         safe_addstr(stdscr, h - 1, 0, status.center(w), curses.color_pair(4))
 
         stdscr.refresh()
-        ch = stdscr.getch()
+        ch = read_key(stdscr)
 
         if ch == 27:  # Esc
             return None
@@ -869,7 +1168,7 @@ def pick_pane(stdscr):
             if panes:
                 return panes[selected]["target"]
             return None
-        elif ch == ord('a'):  # Auto mode
+        elif ch == "a":  # Auto mode
             return ""  # Empty string = auto
         elif ch == curses.KEY_DOWN:
             selected = min(selected + 1, len(panes) - 1)
@@ -882,6 +1181,9 @@ def pick_vault(stdscr, current_vault):
     vaults = load_vaults()
     vault_names = list(vaults.keys())
 
+    parse_cache = load_parse_cache()
+    counts = {name: vault_cheat_count(paths, parse_cache) for name, paths in vaults.items()}
+
     # Put current vault first, then sort the rest
     if current_vault in vault_names:
         vault_names.remove(current_vault)
@@ -938,7 +1240,7 @@ def pick_vault(stdscr, current_vault):
             paths = vaults.get(vault_name, [])
             path_str = str(paths[0]) if paths else "?"
 
-            # Count cheats in this vault (expensive, but cached display)
+            count = counts.get(vault_name)
             is_current = vault_name == current_vault
 
             if idx == selected:
@@ -947,7 +1249,7 @@ def pick_vault(stdscr, current_vault):
                 attr = 0
 
             prefix = "● " if is_current else "  "
-            display = f"{prefix}{vault_name}"
+            display = f"{prefix}{vault_name}" if count is None else f"{prefix}{vault_name} ({count})"
             safe_addstr(stdscr, y, 0, display[:w//3].ljust(w//3), curses.color_pair(1) | curses.A_BOLD | attr)
             safe_addstr(stdscr, y, w//3, path_str[:w*2//3-1], curses.color_pair(2) | attr)
 
@@ -956,7 +1258,7 @@ def pick_vault(stdscr, current_vault):
         safe_addstr(stdscr, h - 1, 0, status.center(w), curses.color_pair(4))
 
         stdscr.refresh()
-        ch = stdscr.getch()
+        ch = read_key(stdscr)
 
         if ch == 27:  # Esc
             return None
@@ -968,12 +1270,12 @@ def pick_vault(stdscr, current_vault):
             selected = min(selected + 1, len(filtered) - 1) if filtered else 0
         elif ch == curses.KEY_UP:
             selected = max(selected - 1, 0)
-        elif ch == curses.KEY_BACKSPACE or ch == 127 or ch == 8:
+        elif ch in BACKSPACE_KEYS:
             query = query[:-1]
             selected = 0
             scroll = 0
-        elif 32 <= ch <= 126:
-            query += chr(ch)
+        elif isinstance(ch, str):
+            query += drain_text(stdscr, ch)
             selected = 0
             scroll = 0
 
@@ -1055,7 +1357,7 @@ def edit_globals(stdscr, globals_dict):
 
         stdscr.refresh()
 
-        ch = stdscr.getch()
+        ch = read_key(stdscr)
 
         if editing:
             if ch == ord('\n'):
@@ -1063,10 +1365,10 @@ def edit_globals(stdscr, globals_dict):
                 editing = False
             elif ch == 27:
                 editing = False
-            elif ch == curses.KEY_BACKSPACE or ch == 127 or ch == 8:
+            elif ch in BACKSPACE_KEYS:
                 edit_buf = edit_buf[:-1]
-            elif 32 <= ch <= 126:
-                edit_buf += chr(ch)
+            elif isinstance(ch, str):
+                edit_buf += drain_text(stdscr, ch)
         else:
             if ch == 27 or ch == 17:  # Esc or Ctrl+Q = exit
                 break
@@ -1085,12 +1387,12 @@ def edit_globals(stdscr, globals_dict):
             elif ch == 19:  # Ctrl+S = save and exit
                 save_globals(globals_dict)
                 break
-            elif ch == curses.KEY_BACKSPACE or ch == 127 or ch == 8:
+            elif ch in BACKSPACE_KEYS:
                 query = query[:-1]
                 selected = 0
                 scroll = 0
-            elif 32 <= ch <= 126:  # Printable = search
-                query += chr(ch)
+            elif isinstance(ch, str):  # Printable = search
+                query += drain_text(stdscr, ch)
                 selected = 0
                 scroll = 0
 
@@ -1152,7 +1454,7 @@ def interactive_params(stdscr, cmd, globals_dict):
         safe_addstr(stdscr, h - 1, 0, status.center(w), curses.color_pair(4))
 
         stdscr.refresh()
-        ch = stdscr.getch()
+        ch = read_key(stdscr)
 
         if editing:
             if ch == ord('\n'):
@@ -1160,10 +1462,10 @@ def interactive_params(stdscr, cmd, globals_dict):
                 editing = False
             elif ch == 27:
                 editing = False
-            elif ch == curses.KEY_BACKSPACE or ch == 127 or ch == 8:
+            elif ch in BACKSPACE_KEYS:
                 edit_buf = edit_buf[:-1]
-            elif 32 <= ch <= 126:
-                edit_buf += chr(ch)
+            elif isinstance(ch, str):
+                edit_buf += drain_text(stdscr, ch)
         else:
             if ch == 27:  # Esc = cancel
                 return None
@@ -1173,19 +1475,25 @@ def interactive_params(stdscr, cmd, globals_dict):
                 selected = min(selected + 1, len(params) - 1)
             elif ch == curses.KEY_UP:
                 selected = max(selected - 1, 0)
-            elif ch == ord('e'):  # e = edit selected param
+            elif ch == "e":  # e = edit selected param
                 editing = True
                 edit_buf = overrides[params[selected]]
 
+# Set once ~/.cheats has been created/checked this process
+CHEATS_DIR_READY = False
+
 def add_cheat(stdscr, globals_dict):
     """Add a new cheat command. Returns True if cheat was added."""
+    global CHEATS_DIR_READY
     CUSTOM_FILE = Path.home() / ".cheats" / "custom.md"
 
     fields = ["title", "command", "tags"]
+    nfields = len(fields)
     values = {"title": "", "command": "", "tags": ""}
     selected = 0
+    current_field = fields[selected]
     editing = False
-    edit_buf = ""
+    edit_buf = []  # Characters being edited, newlines as "\n" entries
 
     while True:
         h, w = stdscr.getmaxyx()
@@ -1211,15 +1519,16 @@ def add_cheat(stdscr, globals_dict):
 
             if is_sel and editing:
                 safe_addstr(stdscr, y, 0, label, curses.color_pair(1))
+                text = "".join(edit_buf)
                 # Show wrapped edit buffer for command
                 if field == "command":
-                    lines = edit_buf.split("\\n")
+                    lines = text.split("\n")
                     safe_addstr(stdscr, y, 12, lines[0] + "█", curses.color_pair(3))
                     for j, line in enumerate(lines[1:], 1):
                         if y + j < h - 2:
                             safe_addstr(stdscr, y + j, 12, line, curses.color_pair(3))
                 else:
-                    safe_addstr(stdscr, y, 12, edit_buf + "█", curses.color_pair(3))
+                    safe_addstr(stdscr, y, 12, text + "█", curses.color_pair(3))
             elif is_sel:
                 safe_addstr(stdscr, y, 0, label, curses.color_pair(1) | curses.A_REVERSE)
                 display = val.replace("\n", "\\n") if val else "<empty>"
@@ -1249,31 +1558,35 @@ def add_cheat(stdscr, globals_dict):
         safe_addstr(stdscr, h - 1, 0, status.center(w), curses.color_pair(4))
 
         stdscr.refresh()
-        ch = stdscr.getch()
+        ch = read_key(stdscr)
+        while ch == -1:  # Nothing read, screen is unchanged
+            ch = read_key(stdscr)
 
         if editing:
             if selected == 1:  # command field - special handling
                 if ch == 4:  # Ctrl+D = done editing command
-                    values["command"] = edit_buf.replace("\\n", "\n")
+                    values["command"] = "".join(edit_buf)
                     editing = False
                 elif ch == ord('\n'):  # Enter = newline in command
-                    edit_buf += "\\n"
+                    edit_buf.append("\n")
                 elif ch == 27:
                     editing = False
-                elif ch == curses.KEY_BACKSPACE or ch == 127 or ch == 8:
-                    edit_buf = edit_buf[:-1]
-                elif 32 <= ch <= 126:
-                    edit_buf += chr(ch)
+                elif ch in BACKSPACE_KEYS:
+                    if edit_buf:
+                        edit_buf.pop()
+                elif isinstance(ch, str):
+                    edit_buf.extend(drain_text(stdscr, ch))
             else:
                 if ch == ord('\n'):
-                    values[fields[selected]] = edit_buf
+                    values[current_field] = "".join(edit_buf)
                     editing = False
                 elif ch == 27:
                     editing = False
-                elif ch == curses.KEY_BACKSPACE or ch == 127 or ch == 8:
-                    edit_buf = edit_buf[:-1]
-                elif 32 <= ch <= 126:
-                    edit_buf += chr(ch)
+                elif ch in BACKSPACE_KEYS:
+                    if edit_buf:
+                        edit_buf.pop()
+                elif isinstance(ch, str):
+                    edit_buf.extend(drain_text(stdscr, ch))
         else:
             if ch == 27:  # Esc = cancel
                 return False
@@ -1282,67 +1595,98 @@ def add_cheat(stdscr, globals_dict):
                     continue  # Need at least title and command
 
                 # Ensure ~/.cheats exists
-                CUSTOM_FILE.parent.mkdir(parents=True, exist_ok=True)
+                if not CHEATS_DIR_READY:
+                    CUSTOM_FILE.parent.mkdir(parents=True, exist_ok=True)
+                    CHEATS_DIR_READY = True
 
                 # Build markdown entry
-                entry = f"\n## {values['title']}\n"
-                if values["tags"]:
-                    for tag in values["tags"].split():
-                        entry += f"#{tag} "
-                    entry += "\n"
-                entry += "```\n"
-                entry += values["command"]
-                entry += "\n```\n"
-
-                # Append to custom file
-                with open(CUSTOM_FILE, "a") as f:
-                    f.write(entry)
+                parts = ["\n## ", values["title"], "\n"]
+                tags = values["tags"].split()
+                if tags:
+                    parts.append("#" + " #".join(tags) + "\n")
+                parts += ["```\n", values["command"], "\n```\n"]
+
+                # Append to custom file, one write(2) with O_APPEND so the entry lands whole at the end
+                data = "".join(parts).encode()
+                flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT
+                try:
+                    fd = os.open(CUSTOM_FILE, flags, 0o644)
+                except FileNotFoundError:  # ~/.cheats went away since it was created
+                    CUSTOM_FILE.parent.mkdir(parents=True, exist_ok=True)
+                    fd = os.open(CUSTOM_FILE, flags, 0o644)
+                try:
+                    while data:
+                        data = data[os.write(fd, data):]
+                finally:
+                    os.close(fd)
 
                 # Extract new params and add to globals
-                for param in get_params(values["command"]):
-                    if param not in globals_dict:
-                        globals_dict[param] = ""
+                new = set(get_params(values["command"])).difference(globals_dict)
+                globals_dict.update(dict.fromkeys(sorted(new), ""))
 
                 return True
 
             elif ch == curses.KEY_DOWN:
-                selected = min(selected + 1, len(fields) - 1)
+                selected = min(selected + 1, nfields - 1)
+                current_field = fields[selected]
             elif ch == curses.KEY_UP:
                 selected = max(selected - 1, 0)
-            elif ch == ord('e'):
+                current_field = fields[selected]
+            elif ch == "e":
                 editing = True
-                edit_buf = values[fields[selected]].replace("\n", "\\n")
+                edit_buf = list(values[current_field])
+
+def cmd_scan(args):
+    """arsenal scan <ip>: set the target IP global."""
+    if not args:
+        print("Usage: arsenal scan <ip>")
+        return 1
+    g = load_globals_simple()
+    g["ip"] = args[0]
+    save_globals(g)
+    print(f"Set ip={args[0]}")
+    return 0
+
+HELP_TEXT = """\
+arsenal - Native terminal cheat launcher
+
+Usage:
+  arsenal              Launch TUI
+  arsenal scan <ip>    Set target IP
+
+Keys:
+  ←/→         Switch category
+  ↑/↓         Navigate commands
+  Enter       Run command (tmux or copy)
+  Ctrl+O      Copy to clipboard (always, even in tmux)
+  Ctrl+T      Pick target tmux pane
+  Ctrl+V      Toggle flat/tree view
+  Ctrl+P      Switch vault/playbook
+  Ctrl+Y      Yank raw command (no param editing)
+  Ctrl+A      Add new cheat command
+  Ctrl+G      Edit global variables
+  Ctrl+D/U    Page down/up
+  Esc         Clear search
+  q/Ctrl+C    Quit
+"""
+
+def cmd_help(args):
+    """arsenal --help: print usage and keys."""
+    sys.stdout.write(HELP_TEXT)
+    return 0
+
+# Command-line subcommands: argv[1] -> handler(remaining args) returning the exit code
+SUBCOMMANDS = {
+    "scan": cmd_scan,
+    "--help": cmd_help,
+    "-h": cmd_help,
+}
 
 def main():
     if len(sys.argv) > 1:
-        if sys.argv[1] == "scan" and len(sys.argv) > 2:
-            g = load_globals_simple()
-            g["ip"] = sys.argv[2]
-            save_globals(g)
-            print(f"Set ip={sys.argv[2]}")
-            return 0
-        elif sys.argv[1] == "--help" or sys.argv[1] == "-h":
-            print("arsenal - Native terminal cheat launcher")
-            print("")
-            print("Usage:")
-            print("  arsenal              Launch TUI")
-            print("  arsenal scan <ip>    Set target IP")
-            print("")
-            print("Keys:")
-            print("  ←/→         Switch category")
-            print("  ↑/↓         Navigate commands")
-            print("  Enter       Run command (tmux or copy)")
-            print("  Ctrl+O      Copy to clipboard (always, even in tmux)")
-            print("  Ctrl+T      Pick target tmux pane")
-            print("  Ctrl+V      Toggle flat/tree view")
-            print("  Ctrl+P      Switch vault/playbook")
-            print("  Ctrl+Y      Yank raw command (no param editing)")
-            print("  Ctrl+A      Add new cheat command")
-            print("  Ctrl+G      Edit global variables")
-            print("  Ctrl+D/U    Page down/up")
-            print("  Esc         Clear search")
-            print("  q/Ctrl+C    Quit")
-            return 0
+        cmd = SUBCOMMANDS.get(sys.argv[1])
+        if cmd:
+            return cmd(sys.argv[2:])
 
     try:
         curses.wrapper(run_tui)